@@ -16,7 +16,6 @@ import argparse
 import collections
 import contextlib
 import filecmp
-import hashlib
 import logging
 import os
 import re
@@ -484,14 +483,8 @@ def _CreateKeepPredicate(resource_exclusion_regex,
       build_utils.MatchesGlob(path, resource_exclusion_exceptions))
 
 
-def _ComputeSha1(path):
-  with open(path, 'rb') as f:
-    data = f.read()
-  return hashlib.sha1(data).hexdigest()
-
-
 def _ConvertToWebPSingle(png_path, cwebp_binary, cwebp_version, webp_cache_dir):
-  sha1_hash = _ComputeSha1(png_path)
+  sha1_hash = resource_utils.ComputeSha1(png_path)
 
   # The set of arguments that will appear in the cache key.
   quality_args = ['-m', '6', '-q', '100', '-lossless']
@@ -8,6 +8,8 @@
 files."""
 
 import argparse
+import concurrent.futures
+import hashlib
 import os
 import shutil
 import sys
@@ -19,6 +21,9 @@ from util import md5_check
 from util import resources_parser
 from util import resource_utils
 
+# The empty .keep file used to preserve otherwise-empty resource directories.
+_EMPTY_KEEP = os.path.join('empty', '.keep')
+
 
 def _ParseArgs(args):
   """Parses command line options.
@@ -66,27 +71,80 @@ def _ParseArgs(args):
   return options
 
 
-def _CheckAllFilesListed(resource_files, resource_dirs):
-  resource_files = set(resource_files)
-  missing_files = []
-  for path, _ in resource_utils.IterResourceFilesInDirectories(resource_dirs):
-    if path not in resource_files:
-      missing_files.append(path)
+def _WalkResourceDir(resource_dir):
+  """Returns (path, archive_path) tuples for every file in |resource_dir|."""
+  files = []
+  if not os.path.isdir(resource_dir):
+    return files
+  # Uses os.scandir() directly, since its entries cache the file type and so
+  # need no extra stat() call per file. Like os.walk(), symlinks to directories
+  # are neither followed nor listed as files.
+  stack = [(resource_dir, '')]
+  while stack:
+    dir_path, archive_dir = stack.pop()
+    with os.scandir(dir_path) as it:
+      for entry in it:
+        archive_path = archive_dir + entry.name
+        if entry.is_dir():
+          if not entry.is_symlink():
+            stack.append((entry.path, archive_path + os.sep))
+        else:
+          files.append((entry.path, archive_path))
+  return files
+
+
+def _WalkResourceDirsOnce(resource_dirs):
+  """Walks each resource directory a single time.
+
+  Directories are walked concurrently, since walking is bound by filesystem
+  latency and the GIL is released during the underlying syscalls.
+
+  Returns:
+    A dict of resource_dir -> list of (path, archive_path) tuples for every file
+    within it, where archive_path is relative to resource_dir. No ignore
+    pattern is applied, so that the same walk can be filtered with different
+    patterns (see _IterNotIgnored()).
+  """
+  if len(resource_dirs) <= 1:
+    return {d: _WalkResourceDir(d) for d in resource_dirs}
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers=min(32, len(resource_dirs))) as executor:
+    # map() returns results in order, so resource_dirs order is preserved.
+    return dict(
+        zip(resource_dirs, executor.map(_WalkResourceDir, resource_dirs)))
+
+
+def _IterNotIgnored(files, ignore_pattern):
+  """Yields the (path, archive_path) tuples not matching |ignore_pattern|."""
+  is_ignored = resource_utils.GetIgnorePatternMatcher(ignore_pattern)
+  for path, archive_path in files:
+    if not is_ignored(archive_path):
+      yield path, archive_path
+
+
+def _CheckAllFilesListed(resource_files, walked):
+  walked_files = {
+      path
+      for files in walked.values()
+      for path, _ in _IterNotIgnored(files, resource_utils.AAPT_IGNORE_PATTERN)
+  }
+  missing_files = walked_files.difference(resource_files)
 
   if missing_files:
     sys.stderr.write('Error: Found files not listed in the sources list of '
                      'the BUILD.gn target:\n')
-    for path in missing_files:
+    for path in sorted(missing_files):
       sys.stderr.write('{}\n'.format(path))
     sys.exit(1)
 
 
-def _ZipResources(resource_dirs, zip_path, ignore_pattern):
+def _ZipResources(walked, zip_path, ignore_pattern):
+  # walked is the result of _WalkResourceDirsOnce().
   # ignore_pattern is a string of ':' delimited list of globs used to ignore
   # files that should not be part of the final resource zip.
   files_to_zip = []
   path_info = resource_utils.ResourceInfoFile()
-  for index, resource_dir in enumerate(resource_dirs):
+  for index, (resource_dir, files) in enumerate(walked.items()):
     attributed_aar = None
     if not resource_dir.startswith('..'):
       aar_source_info_path = os.path.join(
@@ -94,22 +152,25 @@ def _ZipResources(resource_dirs, zip_path, ignore_pattern):
       if os.path.exists(aar_source_info_path):
         attributed_aar = jar_info_utils.ReadAarSourceInfo(aar_source_info_path)
 
-    for path, archive_path in resource_utils.IterResourceFilesInDirectories(
-        [resource_dir], ignore_pattern):
+    zip_prefix = '{}_{}/'.format(index, os.path.basename(resource_dir))
+    for path, archive_path in _IterNotIgnored(files, ignore_pattern):
       attributed_path = path
       if attributed_aar:
-        attributed_path = os.path.join(attributed_aar, 'res',
-                                       path[len(resource_dir) + 1:])
+        attributed_path = os.path.join(attributed_aar, 'res', archive_path)
       # Use the non-prefixed archive_path in the .info file.
       path_info.AddMapping(archive_path, attributed_path)
-
-      resource_dir_name = os.path.basename(resource_dir)
-      archive_path = '{}_{}/{}'.format(index, resource_dir_name, archive_path)
-      files_to_zip.append((archive_path, path))
+      files_to_zip.append((zip_prefix + archive_path, path))
 
   path_info.Write(zip_path + '.info')
 
-  with zipfile.ZipFile(zip_path, 'w') as z:
+  # Entries are stored uncompressed: the zip is only an intermediate container
+  # that is extracted and recompiled by aapt2, so deflating it would spend CPU
+  # for no benefit. allowZip64 costs nothing for small entries, since zipfile
+  # only emits zip64 extra fields for entries that need them.
+  with zipfile.ZipFile(zip_path,
+                       'w',
+                       compression=zipfile.ZIP_STORED,
+                       allowZip64=True) as z:
     # This magic comment signals to resource_utils.ExtractDeps that this zip is
     # not just the contents of a single res dir, without the encapsulating res/
     # (like the outputs of android_generated_resources targets), but instead has
@@ -134,25 +195,41 @@ def _GenerateRTxt(options, r_txt_path):
                                  ignore_pattern).WriteRTxtFile(r_txt_path)
 
 
-def _OnStaleMd5(options):
-  with resource_utils.BuildContext() as build:
-    if options.sources and not options.allow_missing_resources:
-      _CheckAllFilesListed(options.sources, options.resource_dirs)
-    if options.r_text_in:
-      r_txt_path = options.r_text_in
-    else:
-      _GenerateRTxt(options, build.r_txt_path)
-      r_txt_path = build.r_txt_path
+def _OnStaleMd5(options, walked):
+  # The check guards outputs built from the walked files: the zip and a
+  # generated R.txt. A pre-existing R.txt that is merely copied needs no check.
+  if (options.sources and not options.allow_missing_resources
+      and (options.resource_zip_out or not options.r_text_in)):
+    _CheckAllFilesListed(options.sources, walked)
 
+  if options.r_text_in:
+    # Copying a pre-existing R.txt needs no temporary build directory.
     if options.r_text_out:
-      shutil.copyfile(r_txt_path, options.r_text_out)
-
-    if options.resource_zip_out:
-      ignore_pattern = resource_utils.AAPT_IGNORE_PATTERN
-      if options.strip_drawables:
-        ignore_pattern += ':*drawable*'
-      _ZipResources(options.resource_dirs, options.resource_zip_out,
-                    ignore_pattern)
+      # A caller-provided --r-text-in may be old, so copy it to give the
+      # output a fresh mtime.
+      shutil.copyfile(options.r_text_in, options.r_text_out)
+  else:
+    with resource_utils.BuildContext() as build:
+      _GenerateRTxt(options, build.r_txt_path)
+      if options.r_text_out:
+        # The generated R.txt is deleted along with the build context, so move
+        # it rather than copying it.
+        try:
+          os.replace(build.r_txt_path, options.r_text_out)
+          # The generated R.txt is written via AtomicOutput's temporary file,
+          # which is 0600. Give the output the mode a copy would have had.
+          umask = os.umask(0)
+          os.umask(umask)
+          os.chmod(options.r_text_out, 0o666 & ~umask)
+        except OSError:
+          # E.g. when the build context is on a different filesystem.
+          shutil.copyfile(build.r_txt_path, options.r_text_out)
+
+  if options.resource_zip_out:
+    ignore_pattern = resource_utils.AAPT_IGNORE_PATTERN
+    if options.strip_drawables:
+      ignore_pattern += ':*drawable*'
+    _ZipResources(walked, options.resource_zip_out, ignore_pattern)
 
 
 def main(args):
@@ -175,19 +252,34 @@ def main(args):
   # ensures the target will be marked stale when resource files are removed.
   depfile_deps = []
   resource_names = []
-  for resource_dir in options.resource_dirs:
-    for resource_file in build_utils.FindInDirectory(resource_dir, '*'):
+  # The same walk is reused by _OnStaleMd5() to avoid traversing the resource
+  # directories more than once.
+  walked = _WalkResourceDirsOnce(options.resource_dirs)
+  # This loop runs once per resource file, so bind methods and globals to locals
+  # up front.
+  input_paths_append = input_paths.append
+  depfile_deps_append = depfile_deps.append
+  resource_names_append = resource_names.append
+  empty_keep = _EMPTY_KEEP
+  for files in walked.values():
+    for resource_file, resource_name in files:
       # Don't list the empty .keep file in depfile. Since it doesn't end up
       # included in the .zip, it can lead to -w 'dupbuild=err' ninja errors
       # if ever moved.
-      if not resource_file.endswith(os.path.join('empty', '.keep')):
-        input_paths.append(resource_file)
-        depfile_deps.append(resource_file)
-      resource_names.append(os.path.relpath(resource_file, resource_dir))
+      if not resource_file.endswith(empty_keep):
+        input_paths_append(resource_file)
+        depfile_deps_append(resource_file)
+      resource_names_append(resource_name)
 
   # Resource filenames matter to the output, so add them to strings as well.
   # This matters if a file is renamed but not changed (http://crbug.com/597126).
-  input_strings = sorted(resource_names) + [
+  # A single digest of the sorted names keeps the .md5.stamp small for targets
+  # with many files.
+  resource_names.sort()
+  resource_names_digest = hashlib.sha256(
+      '\0'.join(resource_names).encode('utf-8')).hexdigest()
+  input_strings = [
+      'res_names_digest=' + resource_names_digest,
       options.strip_drawables,
   ]
 
@@ -195,7 +287,7 @@ def main(args):
   # targets that they do not need (in reality it only needs the transitive
   # resource targets that those java targets depend on), md5_check is used to
   # prevent outputs from being re-written when real inputs have not changed.
-  md5_check.CallAndWriteDepfileIfStale(lambda: _OnStaleMd5(options),
+  md5_check.CallAndWriteDepfileIfStale(lambda: _OnStaleMd5(options, walked),
                                        options,
                                        input_paths=input_paths,
                                        input_strings=input_strings,
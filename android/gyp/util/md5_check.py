@@ -439,24 +439,27 @@ class _Metadata(object):
     return (entry['path'] for entry in subentries)
 
 
+def _CreateHasher(data=b''):
+  # Despite this module's name, blake2b is used since it is considerably faster
+  # than md5 in CPython. A 16-byte digest keeps stamp entries the same size.
+  return hashlib.blake2b(data, digest_size=16)
+
+
 def _ComputeTagForPath(path):
   stat = os.stat(path)
   if stat.st_size > 1 * 1024 * 1024:
     # Fallback to mtime for large files so that md5_check does not take too long
     # to run.
     return stat.st_mtime
-  md5 = hashlib.md5()
   with open(path, 'rb') as f:
-    md5.update(f.read())
-  return md5.hexdigest()
+    return _CreateHasher(f.read()).hexdigest()
 
 
 def _ComputeInlineMd5(iterable):
-  """Computes the md5 of the concatenated parameters."""
-  md5 = hashlib.md5()
-  for item in iterable:
-    md5.update(str(item).encode('ascii'))
-  return md5.hexdigest()
+  """Computes the digest of the \0-separated parameters."""
+  # Hashing a single joined buffer avoids one update() call per item.
+  data = b'\0'.join(str(item).encode('ascii') for item in iterable)
+  return _CreateHasher(data).hexdigest()
 
 
 def _ExtractZipEntries(path):
@@ -5,7 +5,11 @@
 import argparse
 import collections
 import contextlib
+import fnmatch
+import functools
+import hashlib
 import itertools
+import logging
 import os
 import re
 import shutil
@@ -182,7 +186,7 @@ _TextSymbolEntry = collections.namedtuple('RTextEntry',
 
 def _GenerateGlobs(pattern):
   # This function processes the aapt ignore assets pattern into a list of globs
-  # to be used to exclude files using build_utils.MatchesGlob. It removes the
+  # that GetIgnorePatternMatcher compiles into a single regex. It removes the
   # '!', which is used by aapt to mean 'not chatty' so it does not output if the
   # file is ignored (we dont output anyways, so it is not required). This
   # function does not handle the <dir> and <file> prefixes used by aapt and are
@@ -190,6 +194,19 @@ def _GenerateGlobs(pattern):
   return pattern.replace('!', '').split(':')
 
 
+@functools.lru_cache(maxsize=None)
+def GetIgnorePatternMatcher(ignore_pattern):
+  """Returns a callable that checks paths against an aapt ignore pattern.
+
+  The globs in |ignore_pattern| are compiled once into a single regular
+  expression, rather than having fnmatch translate each glob for every path.
+  Matchers are cached per pattern string.
+  """
+  regex = re.compile('|'.join(
+      fnmatch.translate(g) for g in _GenerateGlobs(ignore_pattern)))
+  return lambda path: regex.match(path) is not None
+
+
 def DeduceResourceDirsFromFileList(resource_files):
   """Return a list of resource directories from a list of resource files."""
   # Directory list order is important, cannot use set or other data structures
@@ -224,7 +241,7 @@ All resource files must follow a structure of "$ROOT/$SUBDIR/$FILE"."""
 
 def IterResourceFilesInDirectories(directories,
                                    ignore_pattern=AAPT_IGNORE_PATTERN):
-  globs = _GenerateGlobs(ignore_pattern)
+  is_ignored = GetIgnorePatternMatcher(ignore_pattern)
   for d in directories:
     for root, _, files in os.walk(d):
       for f in files:
@@ -233,7 +250,7 @@ def IterResourceFilesInDirectories(directories,
         if parent_dir != '.':
           archive_path = os.path.join(parent_dir, f)
         path = os.path.join(root, f)
-        if build_utils.MatchesGlob(archive_path, globs):
+        if is_ignored(archive_path):
           continue
         yield path, archive_path
 
@@ -823,6 +840,14 @@ def _HasMultipleResDirs(zip_path):
     return z.comment == MULTIPLE_RES_MAGIC_STRING
 
 
+def ComputeSha1(path):
+  sha1 = hashlib.sha1()
+  with open(path, 'rb') as f:
+    for chunk in iter(lambda: f.read(65536), b''):
+      sha1.update(chunk)
+  return sha1.hexdigest()
+
+
 def ExtractDeps(dep_zips, deps_dir):
   """Extract a list of resource dependency zip files.
 
@@ -945,6 +970,14 @@ def ResourceArgsParser():
   return (parser, input_opts, output_opts)
 
 
+def _RemoveDuplicates(values, name):
+  """Returns |values| without duplicates, keeping first-seen order."""
+  ret = list(dict.fromkeys(values))
+  if len(ret) != len(values):
+    logging.debug('Removed %d duplicate %s', len(values) - len(ret), name)
+  return ret
+
+
 def HandleCommonOptions(options):
   """Handle common command-line options after parsing.
 
@@ -957,9 +990,14 @@ def HandleCommonOptions(options):
   # Flatten list of include resources list to make it easier to use.
   options.include_resources = [r for resources in options.include_resources
                                for r in resources]
-
-  options.dependencies_res_zips = (
-      build_utils.ParseGnList(options.dependencies_res_zips))
+  # GN deps expansion can list the same file several times. Duplicates only
+  # cost extra hashing in md5_check and extra extraction work.
+  options.include_resources = _RemoveDuplicates(options.include_resources,
+                                                '--include-resources')
+
+  options.dependencies_res_zips = _RemoveDuplicates(
+      build_utils.ParseGnList(options.dependencies_res_zips),
+      '--dependencies-res-zips')
 
   # Don't use [] as default value since some script explicitly pass "".
   if options.extra_res_packages:
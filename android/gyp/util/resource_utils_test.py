@@ -231,6 +231,21 @@ class ResourceUtilsTest(unittest.TestCase):
         resource_utils.FindLocaleInStringResourceFilePath(
             'res/values-foo/ignore-subdirs/whatever.xml'))
 
+  def test_GetIgnorePatternMatcher(self):
+    is_ignored = resource_utils.GetIgnorePatternMatcher(
+        resource_utils.AAPT_IGNORE_PATTERN)
+    for path in ('OWNERS', 'values/OWNERS', 'DIR_METADATA', 'PRESUBMIT.py',
+                 'values/strings.xml~', '.git', 'foo.d.stamp'):
+      self.assertTrue(is_ignored(path), msg="'%s' should be ignored!" % path)
+    for path in ('values/strings.xml', 'drawable/icon.png', 'layout/py.xml'):
+      self.assertFalse(is_ignored(path),
+                       msg="'%s' should not be ignored!" % path)
+
+    is_ignored = resource_utils.GetIgnorePatternMatcher(
+        resource_utils.AAPT_IGNORE_PATTERN + ':*drawable*')
+    self.assertTrue(is_ignored('drawable-hdpi/icon.png'))
+    self.assertFalse(is_ignored('values/strings.xml'))
+
   def test_ParseAndroidResourceStringsFromXml(self):
     ret, namespaces = resource_utils.ParseAndroidResourceStringsFromXml(
         _TEST_XML_INPUT_1)
@@ -109,13 +109,13 @@ class RTxtGenerator(object):
 
   def _CollectResourcesListFromDirectory(self, res_dir):
     ret = set()
-    globs = resource_utils._GenerateGlobs(self.ignore_pattern)
+    is_ignored = resource_utils.GetIgnorePatternMatcher(self.ignore_pattern)
     for root, _, files in os.walk(res_dir):
       resource_type = os.path.basename(root)
       if '-' in resource_type:
         resource_type = resource_type[:resource_type.index('-')]
       for f in files:
-        if build_utils.MatchesGlob(f, globs):
+        if is_ignored(f):
           continue
         if resource_type == 'values':
           ret.update(self._ParseValuesXml(os.path.join(root, f)))